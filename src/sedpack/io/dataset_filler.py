@@ -24,7 +24,7 @@ import uuid
 from sedpack.io.file_info import FileInfo
 from sedpack.io.shard_file_metadata import ShardInfo, ShardsList, ShardListInfo
 from sedpack.io.shard import Shard
-from sedpack.io.types import ExampleT, SplitT
+from sedpack.io.types import BatchT, ExampleT, SplitT
 from sedpack.io.metadata import DatasetStructure
 
 if TYPE_CHECKING:
@@ -144,6 +144,68 @@ class _DatasetFillerContext:
             find the shard with correct `custom_metadata` since a dictionary
             cannot be easily hashed, etc.).
         """
+        current_progress: ShardProgress = self._get_shard_progress(
+            split=split,
+            custom_metadata=custom_metadata,
+        )
+
+        # Write the current example and update counters.
+        current_progress.shard.write(values=values)
+        current_progress.written_examples += 1
+
+    def write_examples(
+            self,
+            values: BatchT,
+            split: SplitT,
+            custom_metadata: Optional[dict[str, Any]] = None) -> None:
+        """Write several examples at once. Opens new shards if necessary,
+        a batch may be split between several shards. The result is the same
+        as calling `write_example` for each of them, only faster.
+
+        Args:
+
+            values (BatchT): A dictionary with all values, the first axis
+            goes over examples (see `ShardWriterBase.write_many`).
+
+            split (SplitT): Which split to write these examples into.
+
+            custom_metadata (Optional[dict[str, Any]]): Optional metadata saved
+            with in the shard info, see `write_example`.
+        """
+        num_examples: int = len(next(iter(values.values()), []))
+        start: int = 0
+        while start < num_examples:
+            current_progress: ShardProgress = self._get_shard_progress(
+                split=split,
+                custom_metadata=custom_metadata,
+            )
+
+            # Fill the current shard at most up to `examples_per_shard`.
+            end: int = min(
+                num_examples,
+                start + self._examples_per_shard -
+                current_progress.written_examples,
+            )
+            current_progress.shard.write_many(values={
+                name: value[start:end]
+                for name, value in values.items()
+            })
+            current_progress.written_examples += end - start
+            start = end
+
+    def _get_shard_progress(
+            self, split: SplitT,
+            custom_metadata: Optional[dict[str, Any]]) -> ShardProgress:
+        """Return the progress of a shard which can accept at least one more
+        example. Opens a new shard if necessary, see `write_example`.
+
+        Args:
+
+            split (SplitT): Which split to write into.
+
+            custom_metadata (Optional[dict[str, Any]]): Optional metadata saved
+            with in the shard info.
+        """
         # Check that we have a shard for the split.
         if split not in self._current_shards_progress:
             self._current_shards_progress[split] = ShardProgress(
@@ -169,12 +231,9 @@ class _DatasetFillerContext:
         if custom_metadata:
             current_progress.shard.shard_info.custom_metadata = custom_metadata
 
-        # Write the current example and update counters.
-        current_progress.shard.write(values=values)
-        current_progress.written_examples += 1
-
         # We have updated the current progress.
         assert self._current_shards_progress[split] == current_progress
+        return current_progress
 
     def close_shard(self, shard: Shard, split: SplitT) -> None:
         """Close shard. Called automatically by DatasetFiller.__exit__."""
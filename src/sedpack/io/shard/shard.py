@@ -20,7 +20,7 @@ from typing import Optional
 import sedpack
 from sedpack.io.metadata import DatasetStructure
 from sedpack.io.shard_file_metadata import ShardInfo
-from sedpack.io.types import ExampleT
+from sedpack.io.types import BatchT, ExampleT
 from sedpack.io.shard.shard_writer_base import ShardWriterBase
 from sedpack.io.shard.get_shard_writer import get_shard_writer
 
@@ -62,6 +62,22 @@ class Shard():
         self._shard_writer.write(values)
         self.shard_info.number_of_examples += 1
 
+    def write_many(self, values: BatchT) -> None:
+        """Write several examples on disk, see
+        `ShardWriterBase.write_many`.
+
+        Args:
+
+            values (BatchT): Attribute values, the first axis goes over
+            examples.
+        """
+        if self._shard_writer is None:
+            raise ValueError("Writing into a shard which has been closed.")
+
+        self._shard_writer.write_many(values)
+        self.shard_info.number_of_examples += len(
+            next(iter(values.values()), []))
+
     def close(self) -> ShardInfo:
         """Close shard and return statistics."""
         if self._shard_writer is None:
@@ -20,7 +20,7 @@ from pathlib import Path
 import numpy as np
 
 from sedpack.io.metadata import DatasetStructure
-from sedpack.io.types import ExampleT, CompressionT
+from sedpack.io.types import BatchT, ExampleT, CompressionT
 
 
 class ShardWriterBase(ABC):
@@ -71,6 +71,39 @@ class ShardWriterBase(ABC):
 
         self._write(values=values)
 
+    def write_many(self, values: BatchT) -> None:
+        """Write several examples on disk. Writing may be buffered. Datasets
+        are filled in batches by `write_examples` of the dataset filler (via
+        `Shard.write_many`).
+
+        Args:
+
+            values (BatchT): Attribute values, the first axis goes over
+            examples.
+        """
+        num_examples: int | None = None
+        for attribute in self.dataset_structure.saved_data_description:
+            value = values[attribute.name]
+
+            # All attributes have to have the same number of examples.
+            if num_examples is None:
+                num_examples = len(value)
+            if len(value) != num_examples:
+                raise ValueError(f"Attribute {attribute.name} has "
+                                 f"{len(value)} examples expected "
+                                 f"{num_examples}")
+
+            if attribute.has_variable_size():
+                continue
+
+            # Check the shape once for the whole batch.
+            current_shape = np.asarray(value).shape[1:]
+            if current_shape != attribute.shape:
+                raise ValueError(f"Attribute {attribute.name} has shape "
+                                 f"{current_shape} expected {attribute.shape}")
+
+        self._write_many(values=values)
+
     @abstractmethod
     def _write(self, values: ExampleT) -> None:
         """Write an example on disk. Writing may be buffered.
@@ -80,6 +113,23 @@ class ShardWriterBase(ABC):
             values (ExampleT): Attribute values.
         """
 
+    def _write_many(self, values: BatchT) -> None:
+        """Write several examples on disk. Writing may be buffered. Shapes
+        have already been checked. Subclasses may override this to process
+        each attribute of the whole batch at once.
+
+        Args:
+
+            values (BatchT): Attribute values, the first axis goes over
+            examples.
+        """
+        num_examples: int = len(next(iter(values.values()), []))
+        for i in range(num_examples):
+            self._write(values={
+                name: value[i]
+                for name, value in values.items()
+            })
+
     @abstractmethod
     def close(self) -> None:
         """Close the shard file(-s).
@@ -16,27 +16,142 @@
 For information about FlatBuffers see https://flatbuffers.dev/
 """
 
+from collections import deque
 from pathlib import Path
+import struct
 import sys
+from typing import NamedTuple, Sequence
 
 import flatbuffers
 import numpy as np
+import numpy.typing as npt
 
 from sedpack.io.compress import CompressedFile
 from sedpack.io.metadata import Attribute, DatasetStructure
-from sedpack.io.types import ExampleT, CompressionT
+from sedpack.io.types import BatchT, ExampleT, CompressionT
 from sedpack.io.shard.shard_writer_base import ShardWriterBase
 
-# Autogenerated from src/sedpack/io/flatbuffer/shard.fbs
-import sedpack.io.flatbuffer.shardfile.Attribute as fbapi_Attribute
-import sedpack.io.flatbuffer.shardfile.Example as fbapi_Example
-import sedpack.io.flatbuffer.shardfile.Shard as fbapi_Shard
+
+class _BufferPool:
+    """Keep data buffers of closed shards to be reused by the following
+    shards. A buffer which has already grown to the size of a shard does not
+    need to be reallocated (and copied) again. The total size of the kept
+    buffers is limited, the oldest buffers are freed first.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20) -> None:
+        """Create an empty pool.
+
+        Args:
+
+            max_bytes (int): Maximum total size of the buffers kept in bytes.
+            Larger buffers are never kept.
+        """
+        self._buffers: deque[bytearray] = deque()
+        self._max_bytes: int = max_bytes
+        self._total_bytes: int = 0
+
+    def acquire(self, min_size: int = 0) -> bytearray:
+        """Return a buffer, either reused or a new one. The content of a
+        reused buffer is arbitrary.
+
+        Args:
+
+            min_size (int): Minimal size of the buffer in bytes. A new buffer
+            is created when the reused one would be smaller.
+        """
+        try:
+            buffer = self._buffers.pop()
+        except IndexError:
+            return bytearray(min_size)
+
+        self._total_bytes -= len(buffer)
+        if len(buffer) < min_size:
+            return bytearray(min_size)
+        return buffer
+
+    def release(self, buffer: bytearray) -> None:
+        """Return the buffer into the pool. The buffer is freed when it is
+        larger than `max_bytes`, older buffers are freed to stay within
+        `max_bytes`.
+
+        Args:
+
+            buffer (bytearray): Buffer which is not going to be used by its
+            previous owner anymore.
+        """
+        if len(buffer) > self._max_bytes:
+            return
+
+        self._buffers.append(buffer)
+        self._total_bytes += len(buffer)
+        while self._total_bytes > self._max_bytes:
+            self._total_bytes -= len(self._buffers.popleft())
+
+    def clear(self) -> None:
+        """Free all kept buffers.
+        """
+        self._buffers.clear()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of the kept buffers in bytes.
+        """
+        return self._total_bytes
+
+
+class _AttributeInfo(NamedTuple):
+    """Everything the writer needs to know about an attribute, decided only
+    once per writer.
+    """
+    attribute: Attribute
+    # Same as `attribute.name`.
+    name: str
+    # Same as `np.dtype(attribute.dtype)`.
+    dtype: np.dtype
+    # Values need to be copied by NumPy, see `_encode_into`.
+    use_numpy: bool
+    # Alignment of the vectors, see `_vector_alignment`.
+    alignment: int
 
 
 class ShardWriterFlatBuffer(ShardWriterBase):
     """Shard writing capabilities.
+
+    The shard is not built using `flatbuffers.Builder`. Each call of `_write`
+    only copies the attribute values (as `[ubyte]` vectors, see
+    `save_numpy_vector_as_bytearray`) into a data buffer. All tables and
+    vectors of offsets are computed at once by `close` and written in front
+    of the data. The schema (src/sedpack/io/flatbuffer/shard.fbs) has a
+    single field in every table thus the layout is static:
+
+    - root offset to the `Shard` table
+    - a single vtable shared by all tables
+    - the `Shard` table
+    - `Shard.examples` vector
+    - all `Example` tables
+    - all `Example.attributes` vectors
+    - all `Attribute` tables
+    - (padding) data buffer with all `Attribute.attribute_bytes` vectors
     """
 
+    # Data buffers shared by all shards written by this process, see
+    # `clear_buffer_pool`.
+    _buffer_pool: _BufferPool = _BufferPool()
+
+    # Size in bytes of a single write call when saving the shard file.
+    write_chunk_size: int = 1 << 20
+
+    # The first data buffer of a shard has at least this many bytes (or
+    # fits a single example), see `_append_example`.
+    initial_data_size: int = 1 << 20
+
+    # Arrays of at least this many bytes are aligned to 32 (medium) or 64
+    # (large) bytes, see `data_alignment`.
+    medium_vector_size: int = 128
+    large_vector_size: int = 4096
+
     def __init__(self, dataset_structure: DatasetStructure,
                  shard_file: Path) -> None:
         """Collect information about a new shard.
@@ -55,9 +170,40 @@ class ShardWriterFlatBuffer(ShardWriterBase):
             shard_file=shard_file,
         )
 
-        self._examples: list = []
-
-        self._builder: flatbuffers.Builder | None = None
+        # Information about each attribute in the order of
+        # `saved_data_description`. The data buffer is placed in the file
+        # aligned to the largest alignment.
+        self._attributes: tuple[_AttributeInfo, ...] = tuple(
+            _AttributeInfo(
+                attribute=attribute,
+                name=attribute.name,
+                dtype=np.dtype(attribute.dtype),
+                use_numpy=(
+                    self.attribute_needs_byteswap(attribute)
+                    or not self._exports_buffer(np.dtype(attribute.dtype))),
+                alignment=self._vector_alignment(attribute),
+            ) for attribute in dataset_structure.saved_data_description)
+
+        # All `attribute_bytes` vectors (length followed by the bytes). Only
+        # the first `self._data_size` bytes are used.
+        self._data: bytearray | None = None
+        self._data_size: int = 0
+
+        # Position of each `attribute_bytes` vector in `self._data`, example
+        # after example.
+        self._vector_positions: list[int] = []
+        self._num_examples: int = 0
+
+        # The data buffer starts small, a shard may hold far fewer examples
+        # than `examples_per_shard`. It grows geometrically up to the size of
+        # a full shard, see `_grow`. Larger shards are rejected by
+        # `_append_example`.
+        example_size: int = self._estimate_example_size()
+        self._full_data_size: int = min(
+            example_size * dataset_structure.examples_per_shard,
+            flatbuffers.Builder.MAX_BUFFER_SIZE)
+        self._initial_data_size: int = min(
+            self._full_data_size, max(self.initial_data_size, example_size))
 
     def _write(self, values: ExampleT) -> None:
         """Write an example on disk. Writing may be buffered.
@@ -66,42 +212,436 @@ class ShardWriterFlatBuffer(ShardWriterBase):
 
             values (ExampleT): Attribute values.
         """
-        if self._builder is None:
-            self._builder = flatbuffers.Builder(0)
-
         # Since we are not saving attribute names we need to make sure to
-        # iterate in the correct order.
-        saved_attributes: list = []
-        for attribute in self.dataset_structure.saved_data_description:
-            attribute_bytes = self.save_numpy_vector_as_bytearray(
-                builder=self._builder,
-                attribute=attribute,
-                value=values[attribute.name],
-            )
-
-            fbapi_Attribute.AttributeStart(self._builder)
-            fbapi_Attribute.AttributeAddAttributeBytes(self._builder,
-                                                       attribute_bytes)
-            saved_attributes.append(fbapi_Attribute.AttributeEnd(
-                self._builder))
-
-        # Save attributes vector.
-        fbapi_Example.ExampleStartAttributesVector(self._builder,
-                                                   len(saved_attributes))
-        for offset in reversed(saved_attributes):
-            self._builder.PrependUOffsetTRelative(offset)
-        attributes_vector_offset = self._builder.EndVector()
-
-        # Save the example.
-        fbapi_Example.ExampleStart(self._builder)
-        fbapi_Example.ExampleAddAttributes(self._builder,
-                                           attributes_vector_offset)
-        self._examples.append(fbapi_Example.ExampleEnd(self._builder))
+        # iterate in the correct order. Check all values before saving any so
+        # that a wrong value does not leave a partially saved example.
+        normalized_values: list[np.ndarray] = []
+        for info in self._attributes:
+            value = values[info.name]
+            # Fast path, the bytes of value can be copied as they are.
+            if (isinstance(value, np.ndarray) and value.dtype == info.dtype
+                    and value.flags.c_contiguous):
+                normalized_values.append(value)
+            else:
+                normalized_values.append(
+                    self._normalize_value(attribute=info.attribute,
+                                          value=value))
+
+        self._append_example(normalized_values)
+
+    def _write_many(self, values: BatchT) -> None:
+        """Write several examples on disk. Writing may be buffered. Each
+        attribute is checked and converted once for the whole batch.
+
+        Args:
+
+            values (BatchT): Attribute values, the first axis goes over
+            examples.
+        """
+        # Check all values before saving any.
+        columns: list[Sequence[np.ndarray] | np.ndarray] = []
+        for info in self._attributes:
+            attribute = info.attribute
+            value = values[info.name]
+            if len(value) == 0:
+                return
+
+            if attribute.has_variable_size():
+                columns.append([
+                    self._normalize_value(attribute=attribute, value=v)
+                    for v in value
+                ])
+            else:
+                # Each row of a c_contiguous array is c_contiguous.
+                columns.append(
+                    self._normalize_value(
+                        attribute=attribute,
+                        value=np.asarray(value),
+                    ).reshape((len(value), -1)))
+
+        for example_values in zip(*columns):
+            self._append_example(example_values)
+
+    def _append_example(self, values: Sequence[np.ndarray]) -> None:
+        """Append the `[ubyte]` vectors of all attributes of a single example
+        into `self._data`.
+
+        This is the hot loop of writing. It works on local variables and
+        inlines the copy of `_encode_into` for values which can be copied by
+        a memoryview, since a Python call per attribute per example is a
+        noticeable part of the cost of small examples.
+
+        Args:
+
+          values (Sequence[np.ndarray]): A c_contiguous array (any shape) for
+          each attribute (in the order of `saved_data_description`). The
+          dtype is the one of the attribute up to the byteorder, as returned
+          by `_normalize_value` or passed unchanged by the fast path of
+          `_write`.
+        """
+        if self._data is None:
+            self._data = self._buffer_pool.acquire(
+                min_size=self._initial_data_size)
+
+        data: bytearray = self._data
+        data_size: int = self._data_size
+        vector_positions: list[int] = self._vector_positions
+        num_vector_positions: int = len(vector_positions)
+        uoffset_size: int = flatbuffers.number_types.UOffsetTFlags.bytewidth
+
+        for value, info in zip(values, self._attributes):
+            length: int = value.nbytes
+            alignment: int = info.alignment
+
+            # Pad such that the data after the length are aligned.
+            position: int = data_size + (-(data_size + uoffset_size) %
+                                         alignment)
+            end: int = position + uoffset_size + length
+            if end > len(data):
+                data = self._grow(used_size=data_size, min_size=end)
+            if position != data_size:
+                data[data_size:position] = bytes(position - data_size)
+
+            vector_positions.append(position)
+            struct.pack_into("<I", data, position, length)
+            # The value may differ from the attribute in byteorder.
+            if info.use_numpy or value.dtype != info.dtype:
+                self._encode_into(
+                    bytes_out=data,
+                    offset=position + uoffset_size,
+                    value=value,
+                    use_numpy=True,
+                )
+            else:
+                data[position + uoffset_size:end] = value.data
+            data_size = end
+
+        if data_size > flatbuffers.Builder.MAX_BUFFER_SIZE:
+            # Forget this example.
+            del vector_positions[num_vector_positions:]
+            raise flatbuffers.builder.BuilderSizeError(
+                "flatbuffers: cannot grow buffer beyond 2 gigabytes")
+
+        self._data_size = data_size
+        self._num_examples += 1
+
+    def _estimate_example_size(self) -> int:
+        """Estimate the size of a single example in the data buffer.
+        Attributes of variable size are counted as empty, the buffer grows
+        when they do not fit.
+
+        Returns: the number of bytes taken by all `attribute_bytes` vectors of
+        a single example, including the padding.
+        """
+        uoffset_size: int = flatbuffers.number_types.UOffsetTFlags.bytewidth
+        example_size: int = 0
+        for info in self._attributes:
+            example_size += uoffset_size + info.alignment - 1
+            if not info.attribute.has_variable_size():
+                example_size += (info.dtype.itemsize *
+                                 int(np.prod(info.attribute.shape)))
+        return example_size
+
+    def _grow(self, used_size: int, min_size: int) -> bytearray:
+        """Replace `self._data` by a buffer of at least `min_size` bytes,
+        doubling the size if possible. While the buffer is smaller than a
+        full shard it does not grow beyond that. It never grows beyond
+        `flatbuffers.Builder.MAX_BUFFER_SIZE` unless `min_size` is larger.
+
+        Args:
+
+          used_size (int): How many bytes at the start of `self._data` are
+          kept.
+
+          min_size (int): Minimal size of the new buffer.
+
+        Returns: the new `self._data`.
+        """
+        assert self._data is not None
+
+        new_size: int = 2 * len(self._data)
+        if len(self._data) < self._full_data_size:
+            new_size = min(new_size, self._full_data_size)
+        new_size = min(new_size, flatbuffers.Builder.MAX_BUFFER_SIZE)
+        new_data = bytearray(max(new_size, min_size))
+        new_data[:used_size] = memoryview(self._data)[:used_size]
+        self._data = new_data
+        return new_data
+
+    @staticmethod
+    def _vector_alignment(attribute: Attribute) -> int:
+        """Alignment of the data of an `attribute_bytes` vector of this
+        attribute, see `data_alignment`.
+
+        Args:
+
+          attribute (Attribute): Description of the attribute (dtype and
+          shape).
+
+        Returns: the alignment in bytes, a power of two.
+        """
+        itemsize: int = np.dtype(attribute.dtype).itemsize
+        nbytes: int = 0
+        if not attribute.has_variable_size():
+            nbytes = itemsize * int(np.prod(attribute.shape))
+        return ShardWriterFlatBuffer.data_alignment(itemsize=itemsize,
+                                                    nbytes=nbytes)
 
     @staticmethod
-    def save_numpy_vector_as_bytearray(builder: flatbuffers.Builder,
-                                       attribute: Attribute,
-                                       value: np.ndarray) -> int:
+    def data_alignment(itemsize: int, nbytes: int) -> int:
+        """Alignment of the data of an `attribute_bytes` vector. Alignment is
+        set to `dtype.itemsize` as opposed to FlatBuffers choice of
+        `dtype.alignment`. The length of a vector is an uint32 thus the
+        alignment is at least four. Larger arrays are aligned to 32 or 64
+        bytes such that readers can use aligned SIMD loads, the padding is
+        small compared to the data.
+
+        Args:
+
+          itemsize (int): Size of a single element in bytes.
+
+          nbytes (int): Size of the whole array in bytes.
+
+        Returns: the alignment in bytes, a power of two.
+        """
+        if nbytes >= ShardWriterFlatBuffer.large_vector_size:
+            return 64
+        if nbytes >= ShardWriterFlatBuffer.medium_vector_size:
+            return 32
+        if itemsize > 4 and itemsize & (itemsize - 1) == 0:
+            return itemsize
+        return 4
+
+    @staticmethod
+    def _shard_header(  # pylint: disable=too-many-locals
+            vector_positions: np.ndarray, data_alignment: int) -> np.ndarray:
+        """Compute everything which is saved in front of the data buffer. See
+        the class docstring for the layout.
+
+        Args:
+
+          vector_positions (np.ndarray): Positions of all `attribute_bytes`
+          vectors in the data buffer, shape `(num_examples,
+          num_attributes)`.
+
+          data_alignment (int): The data buffer starts at a multiple of this.
+
+        Returns: the header as an array of little endian uint32, including
+        the padding before the data buffer.
+
+        Raises: flatbuffers.builder.BuilderSizeError when a vector would start
+        beyond `flatbuffers.Builder.MAX_BUFFER_SIZE`.
+        """
+        num_examples, num_attributes = vector_positions.shape
+        # Size of any offset, vector length or a pair of vtable entries.
+        word: int = 4
+        # Size of a table (offset to the vtable and a single offset field).
+        table: int = 2 * word
+        # Size of a single `Example.attributes` vector.
+        attributes_size: int = word + num_attributes * word
+
+        # Where each part starts, see the class docstring.
+        vtable_position: int = word
+        shard_position: int = 3 * word
+        examples_position: int = shard_position + table
+        example_tables_start: int = (examples_position + word +
+                                     num_examples * word)
+        attributes_start: int = example_tables_start + num_examples * table
+        attribute_tables_start: int = (attributes_start +
+                                       num_examples * attributes_size)
+        header_size: int = (attribute_tables_start +
+                            num_examples * num_attributes * table)
+        data_start: int = -(-header_size // data_alignment) * data_alignment
+
+        # Offsets are uint32, make sure none of them overflows. FlatBuffers
+        # are limited to 2GiB anyway.
+        if (data_start + int(vector_positions.max(initial=0))
+                >= flatbuffers.Builder.MAX_BUFFER_SIZE):
+            raise flatbuffers.builder.BuilderSizeError(
+                "flatbuffers: the shard would be larger than 2 gigabytes")
+
+        example_positions = (example_tables_start +
+                             table * np.arange(num_examples, dtype=np.int64))
+        attributes_positions = (
+            attributes_start +
+            attributes_size * np.arange(num_examples, dtype=np.int64))
+        attribute_positions = (
+            attribute_tables_start + table *
+            np.arange(num_examples * num_attributes, dtype=np.int64).reshape(
+                (num_examples, num_attributes)))
+
+        header = np.zeros(data_start // word, dtype="<u4")
+
+        def save_offsets(positions: np.ndarray, targets: np.ndarray) -> None:
+            """UOffsetT is relative to the position it is written at."""
+            header[positions // word] = targets - positions
+
+        def save_tables(positions: np.ndarray, targets: np.ndarray) -> None:
+            """Tables point to the vtable and to the single field."""
+            header[positions // word] = positions - vtable_position
+            save_offsets(positions + word, targets)
+
+        # Root offset.
+        header[0] = shard_position
+        # The vtable consists of uint16 values: size of the vtable (three
+        # entries), size of the table and offset of the only field.
+        header[1] = (3 * 2) | (table << 16)
+        header[2] = word
+
+        save_tables(np.array([shard_position]), np.array([examples_position]))
+
+        # Vectors are prefixed by their length.
+        header[examples_position // word] = num_examples
+        save_offsets(
+            examples_position + word +
+            word * np.arange(num_examples, dtype=np.int64), example_positions)
+        save_tables(example_positions, attributes_positions)
+
+        header[attributes_positions // word] = num_attributes
+        save_offsets(
+            attributes_positions[:, np.newaxis] + word +
+            word * np.arange(num_attributes, dtype=np.int64),
+            attribute_positions)
+        save_tables(attribute_positions, data_start + vector_positions)
+
+        return header
+
+    @staticmethod
+    def attribute_needs_byteswap(attribute: Attribute) -> bool:
+        """Decide if values of this attribute need to be byteswapped to be
+        saved in little endian which is needed for FlatBuffers.
+
+        Args:
+
+          attribute (Attribute): Description of the attribute (dtype).
+
+        Returns: True iff the bytes of `attribute.dtype` are big endian.
+        """
+        match np.dtype(attribute.dtype).byteorder:
+            case "=":
+                # Native, check sys
+                match sys.byteorder:
+                    case "big":
+                        return True
+                    case "little":
+                        return False
+                    case _:
+                        raise ValueError("Unexpected sys.byteorder")
+            case ">":
+                # Big endian we need to byteswap.
+                return True
+            case "<" | "|":
+                # Either little endian (good for us) or not applicable
+                # (distinction does not matter).
+                return False
+            case _:
+                # Should not happen according to NumPy.
+                raise ValueError("Unexpected value of byteorder for attribute"
+                                 f" {attribute.name}")
+
+    @staticmethod
+    def _exports_buffer(dtype: np.dtype) -> bool:
+        """Decide if arrays of this dtype support the buffer protocol, thus
+        can be copied using a memoryview. This is not the case for example
+        for np.datetime64 and np.timedelta64.
+
+        Args:
+
+          dtype (np.dtype): The dtype in question.
+        """
+        try:
+            _ = np.empty(0, dtype=dtype).data
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _encode_into(bytes_out: bytearray, offset: int, value: np.ndarray,
+                     use_numpy: bool) -> None:
+        """Copy the bytes of `value` into `bytes_out` in little endian without
+        creating any temporary array or bytes object.
+
+        Args:
+
+          bytes_out (bytearray): The destination buffer (e.g.,
+          `flatbuffers.Builder.Bytes`).
+
+          offset (int): Position of the first byte in `bytes_out`.
+
+          value (np.ndarray): A c_contiguous array (any shape). Must not be a
+          non-contiguous view, its memory is copied as is.
+
+          use_numpy (bool): Copy using NumPy which converts to little endian.
+          May be False only when the bytes of `value` are already little
+          endian (see `attribute_needs_byteswap`) and the dtype of `value`
+          supports the buffer protocol (see `_exports_buffer`).
+        """
+        if use_numpy:
+            # Let NumPy swap the bytes while copying (if needed), this is a
+            # single pass over the data as opposed to `byteswap` followed by
+            # a copy.
+            np.frombuffer(
+                bytes_out,
+                dtype=value.dtype.newbyteorder("<"),
+                count=value.size,
+                offset=offset,
+            )[:] = value.reshape(-1)
+        else:
+            # A memoryview (`ndarray.data`) is the cheapest way to copy the raw
+            # bytes.
+            bytes_out[offset:offset + value.nbytes] = value.data
+
+    @staticmethod
+    def _normalize_value(attribute: Attribute,
+                         value: npt.ArrayLike) -> np.ndarray:
+        """Check the dtype of the value and return it flattened,
+        c_contiguous and of the dtype given by `attribute` up to the
+        byteorder. This copies only when the dtype (other than the byteorder)
+        or the memory layout do not match. The original value is never
+        modified. A value in the other byteorder is kept as is, its bytes are
+        swapped while copying it into the shard (see `_encode_into`).
+
+        Args:
+
+          attribute (Attribute): Description of this attribute (shape and dtype).
+
+          value (npt.ArrayLike): The array to be saved. Might also be a
+          Python scalar or a bytes object.
+
+        Returns: the flattened array, possibly a view of `value`. Callers
+        need to compare its dtype with the attribute dtype to know if it has
+        the byteorder of the attribute.
+
+        Raises: ValueError when `value` cannot be safely cast to
+        `attribute.dtype`.
+        """
+        original_value = np.asarray(value)
+
+        # This is the workaround when the user passes a value which is
+        # wrong dtype. Then a different number of bytes could be saved than
+        # read causing unpredictable issues. Equal dtypes need no check.
+        if (original_value.dtype != attribute.dtype and not np.can_cast(
+                original_value.dtype, to=attribute.dtype, casting="safe")):
+            raise ValueError(f"Cannot cast value of dtype "
+                             f"{original_value.dtype} passed as "
+                             f"{attribute = }")
+
+        target_dtype = np.dtype(attribute.dtype)
+        if (original_value.dtype != target_dtype
+                and original_value.dtype.newbyteorder("=")
+                == target_dtype.newbyteorder("=")):
+            # Only the byteorder differs, avoid converting into a new array.
+            return np.ascontiguousarray(original_value).reshape(-1)
+
+        return np.ascontiguousarray(original_value,
+                                    dtype=target_dtype).reshape(-1)
+
+    @staticmethod
+    def save_numpy_vector_as_bytearray(
+            builder: flatbuffers.Builder,
+            attribute: Attribute,
+            value: np.ndarray,
+            needs_byteswap: bool | None = None) -> int:
         """Save a given array into a FlatBuffer as bytes. This is to ensure
         compatibility with types which are not supported by FlatBuffers (e.g.,
         np.float16).  The FlatBuffers schema must mark this vector as type
@@ -117,8 +657,8 @@ class ShardWriterFlatBuffer(ShardWriterBase):
         bytes. This function does not modify the `value`, and saves a flattened
         version of it. This function also saves the exact dtype as given by
         `attribute`. Bytes are being saved in little endian ("<") and
-        c_contiguous ("C") order, same as with FlatBuffers. Alignment is set to
-        `dtype.itemsize` as opposed to FlatBuffers choice of `dtype.alignment`.
+        c_contiguous ("C") order, same as with FlatBuffers. Alignment is given
+        by `data_alignment`.
 
         Args:
 
@@ -130,6 +670,11 @@ class ShardWriterFlatBuffer(ShardWriterBase):
           value (np.ndarray): The array to be saved. The shape should be as
           defined in `attribute` (will be flattened).
 
+          needs_byteswap (bool | None): The result of
+          `attribute_needs_byteswap(attribute)`, callers saving many values
+          of the same attribute may pass a precomputed value. Computed when
+          None.
+
         Returns: The offset returned by `flatbuffers.Builder.EndVector`.
         """
         # Not sure about flatbuffers.Builder __bool__ semantics.
@@ -137,58 +682,40 @@ class ShardWriterFlatBuffer(ShardWriterBase):
 
         # See `flatbuffers.builder.Builder.CreateNumpyVector`.
 
-        # Copy the value in order not to modify the original and flatten for
-        # better saving.
-        value = np.copy(value).flatten()
-
-        # This is the workaround when the user passes a value which is
-        # wrong dtype. Then a different number of bytes could be saved than
-        # read causing unpredictable issues.
-        if not np.can_cast(value, to=attribute.dtype, casting="safe"):
-            raise ValueError(f"Cannot cast value of dtype {value.dtype} "
-                             f"passed as {attribute = }")
-        value = np.array(value, dtype=attribute.dtype)
-
-        # Ensure little endian which is needed for FlatBuffers.
-        match value.dtype.byteorder:
-            case "=":
-                # Native, check sys
-                match sys.byteorder:
-                    case "big":
-                        value = value.byteswap(inplace=False)
-                    case "little":
-                        pass
-                    case _:
-                        raise ValueError("Unexpected sys.byteorder")
-            case ">":
-                # Big endian we need to byteswap.
-                value = value.byteswap(inplace=False)
-            case "<" | "|":
-                # Either little endian (good for us) or not applicable
-                # (distinction does not matter).
-                pass
-            case _:
-                # Should not happen according to NumPy.
-                raise ValueError("Unexpected value of byteorder for attribute"
-                                 f" {attribute.name}")
+        value = ShardWriterFlatBuffer._normalize_value(attribute=attribute,
+                                                       value=value)
 
-        # This is going to be saved, ensure c_contiguous ordering.
-        byte_representation = value.tobytes(order="C")
+        # Ensure little endian which is needed for FlatBuffers. The value may
+        # be in the other byteorder than the attribute.
+        if needs_byteswap is None:
+            needs_byteswap = ShardWriterFlatBuffer.attribute_needs_byteswap(
+                attribute)
+        use_numpy: bool = (
+            needs_byteswap or value.dtype != attribute.dtype
+            or not ShardWriterFlatBuffer._exports_buffer(value.dtype))
 
-        # Total length of the array (in bytes).
-        length: int = len(byte_representation)
+        # Total length of the array (in bytes). The value is already
+        # c_contiguous and flat.
+        length: int = value.nbytes
 
         # Start a vector and move head accordingly.
         builder.StartVector(
             elemSize=1,  # Storing bytes.
             numElems=length,
-            alignment=value.dtype.itemsize,  # Cautious alignment of the array.
+            alignment=ShardWriterFlatBuffer.data_alignment(
+                itemsize=value.dtype.itemsize,
+                nbytes=length,
+            ),
         )
         builder.head = int(builder.Head() - length)
 
-        # Copy values.
-        builder.Bytes[builder.Head():builder.Head() +
-                      length] = byte_representation
+        # Copy values directly into the builder buffer.
+        ShardWriterFlatBuffer._encode_into(
+            bytes_out=builder.Bytes,
+            offset=builder.Head(),
+            value=value,
+            use_numpy=use_numpy,
+        )
 
         # Not sure why the length is being set again (potentially allowing
         # recursive structures?).
@@ -200,34 +727,49 @@ class ShardWriterFlatBuffer(ShardWriterBase):
     def close(self) -> None:
         """Close the shard file(-s).
         """
-        if not self._examples:
+        if not self._num_examples:
             # Nothing to save.
             assert not self._shard_file.is_file()
             return
 
-        # Save examples vector.
-        fbapi_Shard.ShardStartExamplesVector(self._builder,
-                                             len(self._examples))
-        for offset in reversed(self._examples):
-            self._builder.PrependUOffsetTRelative(offset)
-        examples_vector_offset = self._builder.EndVector()
-
-        # Save the shard.
-        fbapi_Shard.ShardStart(self._builder)
-        fbapi_Shard.ShardAddExamples(self._builder, examples_vector_offset)
-        shard = fbapi_Shard.ShardEnd(self._builder)
-
-        # Finish the builder.
-        self._builder.Finish(shard)
-
-        # Write the buffer into a file.
-        with CompressedFile(self.dataset_structure.compression).open(
-                self._shard_file, "wb") as file:
-            file.write(self._builder.Output())
+        assert self._data is not None
 
-        self._builder = None
+        vector_positions = np.array(self._vector_positions, dtype=np.int64)
+        header = self._shard_header(
+            vector_positions=vector_positions.reshape(
+                (self._num_examples, len(self._attributes))),
+            data_alignment=max(
+                (info.alignment for info in self._attributes),
+                default=4,
+            ),
+        )
+        if (header.nbytes + self._data_size
+                > flatbuffers.Builder.MAX_BUFFER_SIZE):
+            raise flatbuffers.builder.BuilderSizeError(
+                "flatbuffers: the shard would be larger than 2 gigabytes")
+
+        # Write the header and the data into a file. Writing in chunks lets
+        # the compression work on part of the data at a time.
+        chunk_size: int = self.write_chunk_size
+        with memoryview(self._data) as data:
+            with CompressedFile(self.dataset_structure.compression).open(
+                    self._shard_file, "wb") as file:
+                file.write(header)
+                for start in range(0, self._data_size, chunk_size):
+                    end: int = min(start + chunk_size, self._data_size)
+                    file.write(data[start:end])
+
+        self._buffer_pool.release(self._data)
+        self._data = None
         assert self._shard_file.is_file()
 
+    @staticmethod
+    def clear_buffer_pool() -> None:
+        """Free the data buffers kept for reuse by the following shards. At
+        most 64MiB of buffers are kept after all shards are closed.
+        """
+        ShardWriterFlatBuffer._buffer_pool.clear()
+
     @staticmethod
     def supported_compressions() -> list[CompressionT]:
         """Return a list of supported compression types.
@@ -68,3 +68,8 @@ ShardFileTypeT: TypeAlias = Literal[
 
 # Type alias for example, this is what gets iterated or saved.
 ExampleT: TypeAlias = dict[str, AttributeValueT]
+
+# Type alias for several examples. Values of each attribute are stacked along
+# the first axis (or listed when the attribute has a variable size).
+BatchT: TypeAlias = dict[str, Union[npt.NDArray[np.generic],
+                                    list[AttributeValueT]]]
@@ -27,8 +27,10 @@ from sedpack.io.tfrec import IterateShardTFRec
 from sedpack.io.shard.get_shard_writer import get_shard_writer, _SHARD_FILE_TYPE_TO_CLASS
 
 
-def shard_write_and_read(attributes: dict[str, np.ndarray], shard_file: Path,
-                         shard_file_type: ShardFileTypeT) -> None:
+def shard_write_and_read(attributes: dict[str, np.ndarray],
+                         shard_file: Path,
+                         shard_file_type: ShardFileTypeT,
+                         batched: bool = False) -> None:
     dataset_structure = DatasetStructure(
         saved_data_description=[
             Attribute(
@@ -45,11 +47,14 @@ def shard_write_and_read(attributes: dict[str, np.ndarray], shard_file: Path,
     writer = get_shard_writer(dataset_structure=dataset_structure,
                               shard_file=shard_file)
     one_value = next(iter(attributes.values()))  # One of the values.
-    for i in range(one_value.shape[0]):
-        writer.write(values={
-            name: value[i]
-            for name, value in attributes.items()
-        })
+    if batched:
+        writer.write_many(values=attributes)
+    else:
+        for i in range(one_value.shape[0]):
+            writer.write(values={
+                name: value[i]
+                for name, value in attributes.items()
+            })
     writer.close()
 
     iterate_shard: IterateShardBase
@@ -153,6 +158,102 @@ def test_fb_mixed(tmp_path):
     shard_write_and_read(attributes, shard_file, shard_file_type="fb")
 
 
+@pytest.mark.parametrize("shard_file_type", ["npz", "fb"])
+def test_write_many(tmp_path, shard_file_type):
+    shard_file = tmp_path / f"shard_file.{shard_file_type}"
+    attributes = {
+        "a": np.random.uniform(size=(10, 15)),
+        "b": np.random.uniform(size=(10, 5, 3)).astype(">f4"),
+        "c": np.random.randint(-5, 20, size=(10, 21)),
+        # Not c_contiguous.
+        "d": np.random.randint(-5, 20, size=(21, 10)).astype(np.int16).T,
+    }
+    shard_write_and_read(attributes,
+                         shard_file,
+                         shard_file_type=shard_file_type,
+                         batched=True)
+
+
+def test_write_many_tfrec(tmp_path):
+    # The default `_write_many` writing example by example.
+    shard_file = tmp_path / "shard_file"
+    attributes = {
+        "a": np.array(np.random.uniform(size=(10, 15)), dtype=np.float32),
+        "b": np.random.randint(-5, 20, size=(10, 21)),
+    }
+    shard_write_and_read(attributes,
+                         shard_file,
+                         shard_file_type="tfrec",
+                         batched=True)
+
+
+def test_write_many_wrong_values(tmp_path):
+    dataset_structure = DatasetStructure(
+        saved_data_description=[
+            Attribute(name="a", shape=(3, ), dtype="float32"),
+            Attribute(name="b", shape=(2, ), dtype="int32"),
+        ],
+        shard_file_type="fb",
+        compression="",
+    )
+    writer = get_shard_writer(dataset_structure=dataset_structure,
+                              shard_file=tmp_path / "shard_file")
+
+    with pytest.raises(ValueError, match="examples"):
+        writer.write_many(
+            values={
+                "a": np.zeros((4, 3), dtype=np.float32),
+                "b": np.zeros((5, 2), dtype=np.int32),
+            })
+
+    with pytest.raises(ValueError, match="shape"):
+        writer.write_many(
+            values={
+                "a": np.zeros((4, 3), dtype=np.float32),
+                "b": np.zeros((4, 3), dtype=np.int32),
+            })
+
+    with pytest.raises(ValueError, match="cast"):
+        writer.write_many(
+            values={
+                "a": np.zeros((4, 3), dtype=np.float64),
+                "b": np.zeros((4, 2), dtype=np.int32),
+            })
+
+
+def test_fb_consecutive_shards(tmp_path):
+    # A smaller shard written after a larger one (data buffers may be
+    # reused) reads back exactly its own examples. Zeroed padding is checked
+    # by test_shard_writer_zeroes_padding_of_reused_buffer.
+    larger_attributes = {
+        "a": np.random.uniform(size=(100, 15)),
+        "b": np.random.randint(-5, 20, size=(100, 21)),
+    }
+    shard_write_and_read(larger_attributes,
+                         tmp_path / "shard_file_0",
+                         shard_file_type="fb")
+    smaller_attributes = {
+        "a": np.random.uniform(size=(3, 15)),
+        "b": np.random.randint(-5, 20, size=(3, 21)),
+    }
+    shard_write_and_read(smaller_attributes,
+                         tmp_path / "shard_file_1",
+                         shard_file_type="fb")
+
+
+def test_fb_big_endian(tmp_path):
+    # Examples per shard
+    E = 17
+    shard_file = tmp_path / "shard_file"
+    attributes = {
+        "a_int16": np.random.uniform(-5, 5, size=(E, 15, 3)).astype(">i2"),
+        "a_uint32": np.random.uniform(0, 5, size=(E, 11)).astype(">u4"),
+        "a_float16": np.random.uniform(-5, 5, size=(E, 7)).astype(">f2"),
+        "a_float64": np.random.uniform(-5, 5, size=(E, 2, 5)).astype(">f8"),
+    }
+    shard_write_and_read(attributes, shard_file, shard_file_type="fb")
+
+
 def test_fb_all_dtypes_np(tmp_path):
     # Examples per shard
     E = 111
@@ -12,12 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from pathlib import Path
+import sys
+
 import flatbuffers
 import numpy as np
+import pytest
 
-from sedpack.io.metadata import Attribute
-from sedpack.io.shard.shard_writer_flatbuffer import ShardWriterFlatBuffer
+from sedpack.io.metadata import Attribute, DatasetStructure
+from sedpack.io.types import ExampleT
+from sedpack.io.shard.shard_writer_flatbuffer import ShardWriterFlatBuffer, _BufferPool
 from sedpack.io.flatbuffer.iterate import IterateShardFlatBuffer
+import sedpack.io.flatbuffer.shardfile.Shard as fbapi_Shard
 
 from sedpack.io.flatbuffer.unit_tests.shard_writer_flatbuffer_test_schema.NumPyVectorTest import *
 
@@ -149,3 +155,398 @@ def test_can_write_and_read():
             np_bytes=parsed_test_vectors.AttributeDoubleAsNumpy(),
             attribute=attribute_description["attribute_double"],
         ), attributes["attribute_double"])
+
+
+def test_attribute_needs_byteswap():
+    """FlatBuffers are little endian, only big endian dtypes need swapping.
+    """
+
+    def needs_byteswap(dtype: str) -> bool:
+        return ShardWriterFlatBuffer.attribute_needs_byteswap(
+            Attribute(name="a", shape=(1, ), dtype=dtype))
+
+    assert needs_byteswap(">i4")
+    assert needs_byteswap(">f8")
+    assert not needs_byteswap("<u2")
+    assert not needs_byteswap("uint8")
+    assert not needs_byteswap("bool")
+    assert needs_byteswap("float32") == (sys.byteorder == "big")
+
+
+def test_big_endian_is_saved_as_little_endian():
+    """Big endian values are byteswapped while being copied into the buffer.
+    """
+    builder = flatbuffers.Builder(0)
+
+    value = np.arange(-20, 40, 3, dtype=">i4").reshape(4, 5)
+    original = np.copy(value)
+    description = Attribute(name="attribute_int",
+                            shape=value.shape,
+                            dtype=">i4")
+    offset = ShardWriterFlatBuffer.save_numpy_vector_as_bytearray(
+        builder,
+        attribute=description,
+        value=value,
+    )
+
+    NumPyVectorTestStart(builder)
+    AddAttributeInt(builder, offset)
+    builder.Finish(NumPyVectorTestEnd(builder))
+    parsed_test_vectors = NumPyVectorTest.GetRootAs(builder.Output())
+
+    np_bytes = parsed_test_vectors.AttributeIntAsNumpy()
+    assert np.array_equal(np.frombuffer(np_bytes, dtype="<i4"),
+                          value.reshape(-1))
+    assert np.array_equal(
+        IterateShardFlatBuffer.decode_array(
+            np_bytes=np_bytes,
+            attribute=description,
+        ), value)
+    # The original value has not been modified.
+    assert np.array_equal(value, original)
+    assert value.dtype == original.dtype
+
+
+def shard_write_and_read(
+    shard_file: Path,
+    saved_data_description: list[Attribute],
+    examples: list[ExampleT],
+    invalid_examples: dict[int, tuple[ExampleT, type[Exception]]]
+    | None = None,
+) -> bytes:
+    """Write `examples` using ShardWriterFlatBuffer, check that exactly those
+    are read back using generated FlatBuffers code.
+
+    Args:
+
+      shard_file (Path): Where to save the shard.
+
+      saved_data_description (list[Attribute]): The attributes.
+
+      examples (list[ExampleT]): The examples to be saved.
+
+      invalid_examples (dict[int, tuple[ExampleT, type[Exception]]] | None):
+      An example written right after `examples[i]` together with the
+      exception it raises. These are not saved.
+
+    Returns: the content of the shard file.
+    """
+    dataset_structure = DatasetStructure(
+        saved_data_description=saved_data_description,
+        shard_file_type="fb",
+        compression="",
+    )
+    writer = ShardWriterFlatBuffer(dataset_structure=dataset_structure,
+                                   shard_file=shard_file)
+    invalid_examples = invalid_examples or {}
+    for i, example in enumerate(examples):
+        writer.write(example)
+        if i in invalid_examples:
+            invalid_example, error = invalid_examples[i]
+            with pytest.raises(error):
+                writer.write(invalid_example)
+    writer.close()
+
+    content = shard_file.read_bytes()
+    shard = fbapi_Shard.Shard.GetRootAs(content, 0)
+    assert shard.ExamplesLength() == len(examples)
+    for i, example in enumerate(examples):
+        for j, attribute in enumerate(saved_data_description):
+            np_bytes = shard.Examples(i).Attributes(j).AttributeBytesAsNumpy()
+            if attribute.dtype == "bytes":
+                assert bytes(np_bytes) == example[attribute.name]
+            else:
+                assert np.array_equal(
+                    IterateShardFlatBuffer.decode_array(
+                        np_bytes=np_bytes,
+                        attribute=attribute,
+                    ), example[attribute.name])
+    return content
+
+
+@pytest.mark.parametrize("value_dtype,attribute_dtype", [
+    (">i4", "<i4"),
+    ("<i4", ">i4"),
+    (">f8", "float64"),
+])
+def test_other_byteorder_is_saved_as_little_endian(value_dtype,
+                                                   attribute_dtype):
+    """A value which differs from the attribute only in byteorder is saved
+    in little endian.
+    """
+    builder = flatbuffers.Builder(0)
+
+    value = np.arange(-20, 40, 3).astype(value_dtype).reshape(4, 5)
+    description = Attribute(name="attribute_int",
+                            shape=value.shape,
+                            dtype=attribute_dtype)
+    offset = ShardWriterFlatBuffer.save_numpy_vector_as_bytearray(
+        builder,
+        attribute=description,
+        value=value,
+    )
+
+    NumPyVectorTestStart(builder)
+    AddAttributeInt(builder, offset)
+    builder.Finish(NumPyVectorTestEnd(builder))
+    parsed_test_vectors = NumPyVectorTest.GetRootAs(builder.Output())
+
+    np_bytes = parsed_test_vectors.AttributeIntAsNumpy()
+    assert np.array_equal(
+        np.frombuffer(np_bytes,
+                      dtype=np.dtype(attribute_dtype).newbyteorder("<")),
+        value.reshape(-1))
+
+
+def test_shard_writer_alignment_and_wrong_value(tmp_path):
+    """Data of each attribute are aligned to the itemsize (at least four) or
+    to 32 or 64 bytes for larger arrays and a value which cannot be saved
+    does not corrupt the shard.
+    """
+    saved_data_description = [
+        Attribute(name="a", shape=(3, ), dtype="uint8"),
+        Attribute(name="b", shape=(5, ), dtype="float64"),
+        Attribute(name="c", shape=(2, ), dtype="float16"),
+        Attribute(name="d", shape=(67, ), dtype="float16"),
+        Attribute(name="e", shape=(9, 301), dtype="uint8"),
+    ]
+    examples = [{
+        "a": np.random.randint(0, 256, size=3, dtype=np.uint8),
+        "b": np.random.uniform(size=5),
+        "c": np.random.uniform(size=2).astype(np.float16),
+        "d": np.random.uniform(size=67).astype(np.float16),
+        "e": np.random.randint(0, 256, size=(9, 301), dtype=np.uint8),
+    } for _ in range(7)]
+    content = shard_write_and_read(
+        tmp_path / "shard_file",
+        saved_data_description,
+        examples,
+        invalid_examples={
+            3: (examples[3] | {
+                "c": np.random.uniform(size=2)
+            }, ValueError),
+        },
+    )
+
+    # Positions relative to the start of the file.
+    content_address = np.frombuffer(content, dtype=np.uint8).ctypes.data
+    shard = fbapi_Shard.Shard.GetRootAs(content, 0)
+    for i in range(len(examples)):
+        for j, attribute in enumerate(saved_data_description):
+            np_bytes = shard.Examples(i).Attributes(j).AttributeBytesAsNumpy()
+            data_position = np_bytes.ctypes.data - content_address
+            alignment = {"b": 8, "d": 32, "e": 64}.get(attribute.name, 4)
+            assert data_position % alignment == 0
+
+
+def test_shard_writer_single_vtable(tmp_path):
+    """All tables of a shard share a single vtable.
+    """
+    content = shard_write_and_read(
+        tmp_path / "shard_file",
+        [
+            Attribute(name="a", shape=(3, ), dtype="int32"),
+            Attribute(name="b", shape=(), dtype="bytes"),
+        ],
+        [{
+            "a": np.arange(3, dtype=np.int32) + i,
+            "b": bytes(range(i + 1)),
+        } for i in range(13)],
+    )
+    shard = fbapi_Shard.Shard.GetRootAs(content, 0)
+
+    def vtable_position(table: flatbuffers.table.Table) -> int:
+        soffset = flatbuffers.encode.Get(flatbuffers.packer.soffset,
+                                         table.Bytes, table.Pos)
+        return table.Pos - soffset
+
+    vtables = {vtable_position(shard._tab)}
+    for i in range(shard.ExamplesLength()):
+        example = shard.Examples(i)
+        vtables.add(vtable_position(example._tab))
+        for j in range(example.AttributesLength()):
+            vtables.add(vtable_position(example.Attributes(j)._tab))
+    assert len(vtables) == 1
+
+
+def test_shard_header_too_large():
+    """Offsets beyond the FlatBuffers limit are rejected and not wrapped.
+    """
+    with pytest.raises(flatbuffers.builder.BuilderSizeError):
+        ShardWriterFlatBuffer._shard_header(
+            vector_positions=np.array([[5 * 2**30]], dtype=np.int64),
+            data_alignment=64,
+        )
+
+
+def test_shard_writer_too_large(tmp_path, monkeypatch):
+    """Writing more than `flatbuffers.Builder.MAX_BUFFER_SIZE` raises and
+    keeps the examples written so far.
+    """
+    monkeypatch.setattr(flatbuffers.Builder, "MAX_BUFFER_SIZE", 1_024)
+    shard_write_and_read(
+        tmp_path / "shard_file",
+        [
+            Attribute(name="a", shape=(), dtype="bytes"),
+            Attribute(name="b", shape=(), dtype="bytes"),
+        ],
+        [{
+            "a": bytes(range(100)),
+            "b": bytes(range(i + 1))
+        } for i in range(3)],
+        invalid_examples={
+            2: ({
+                "a": bytes(100),
+                "b": bytes(1_000)
+            }, flatbuffers.builder.BuilderSizeError),
+        },
+    )
+
+
+def test_shard_writer_preallocates_data(tmp_path):
+    """A shard of fixed size attributes fits into the initial data buffer.
+    """
+    dataset_structure = DatasetStructure(
+        saved_data_description=[
+            Attribute(name="a", shape=(3, ), dtype="uint8"),
+            Attribute(name="b", shape=(5, 7), dtype="float64"),
+            Attribute(name="c", shape=(1, ), dtype="int16"),
+        ],
+        shard_file_type="fb",
+        compression="",
+        examples_per_shard=50,
+    )
+    writer = ShardWriterFlatBuffer(dataset_structure=dataset_structure,
+                                   shard_file=tmp_path / "shard_file")
+    example = {
+        "a": np.zeros(3, dtype=np.uint8),
+        "b": np.zeros((5, 7)),
+        "c": np.zeros(1, dtype=np.int16),
+    }
+    writer.write(example)
+    data = writer._data
+    for _ in range(dataset_structure.examples_per_shard - 1):
+        writer.write(example)
+    assert writer._data is data
+    assert writer._data_size <= writer._full_data_size
+    writer.close()
+
+
+def test_shard_writer_small_shard_does_not_reserve_full_shard(tmp_path):
+    """The first data buffer fits a few examples, not `examples_per_shard`.
+    """
+    ShardWriterFlatBuffer.clear_buffer_pool()
+    example_size: int = 1 << 20
+    dataset_structure = DatasetStructure(
+        saved_data_description=[
+            Attribute(name="a", shape=(example_size, ), dtype="uint8"),
+        ],
+        shard_file_type="fb",
+        compression="",
+        examples_per_shard=256,
+    )
+    writer = ShardWriterFlatBuffer(dataset_structure=dataset_structure,
+                                   shard_file=tmp_path / "shard_file")
+    writer.write({"a": np.ones(example_size, dtype=np.uint8)})
+    assert writer._data is not None
+    assert len(writer._data) < 2 * example_size
+
+    # The buffer grows geometrically.
+    for _ in range(5):
+        writer.write({"a": np.ones(example_size, dtype=np.uint8)})
+    assert len(writer._data) < 2 * writer._data_size
+    writer.close()
+    ShardWriterFlatBuffer.clear_buffer_pool()
+
+
+def test_shard_writer_non_contiguous_values(tmp_path):
+    """Views which are not c_contiguous are saved in the correct order and
+    values in the other byteorder than the attribute are saved correctly.
+    """
+    shard_write_and_read(
+        tmp_path / "shard_file",
+        [
+            Attribute(name="transposed", shape=(4, 3), dtype="float32"),
+            Attribute(name="strided", shape=(5, ), dtype="int64"),
+            Attribute(name="swapped", shape=(6, ), dtype="<i4"),
+        ],
+        [{
+            "transposed": np.random.uniform(size=(3, 4)).astype(np.float32).T,
+            "strided": np.arange(10, dtype=np.int64)[::2] + i,
+            "swapped": (np.arange(-3, 3) * 1_000_000 + i).astype(">i4"),
+        } for i in range(5)],
+    )
+
+
+def test_shard_writer_datetime(tmp_path):
+    """Dtypes which do not support the buffer protocol can be saved.
+    """
+    start = np.datetime64("2024-03-01T12:00:00", "s")
+    shard_write_and_read(
+        tmp_path / "shard_file",
+        [
+            Attribute(name="datetime", shape=(3, ), dtype="datetime64[s]"),
+            Attribute(name="timedelta", shape=(2, ), dtype="timedelta64[ms]"),
+            Attribute(name="swapped", shape=(4, ), dtype=">M8[D]"),
+        ],
+        [{
+            "datetime": start + np.arange(3) * i,
+            "timedelta": np.array([i, -i], dtype="timedelta64[ms]"),
+            "swapped": (start + np.arange(4) * i).astype(">M8[D]"),
+        } for i in range(5)],
+    )
+
+
+def test_buffer_pool_limits_total_size():
+    """The pool keeps at most `max_bytes` and never a larger buffer.
+    """
+    pool = _BufferPool(max_bytes=100)
+    pool.release(bytearray(101))
+    assert pool.total_bytes == 0
+
+    for _ in range(3):
+        pool.release(bytearray(40))
+    assert pool.total_bytes == 80
+
+    assert len(pool.acquire(min_size=10)) == 40
+    assert pool.total_bytes == 40
+
+    pool.clear()
+    assert pool.total_bytes == 0
+    assert len(pool.acquire(min_size=10)) == 10
+
+
+def test_shard_writer_zeroes_padding_of_reused_buffer(tmp_path):
+    """A reused data buffer contains bytes of a previous shard, padding
+    between vectors must not leak them into the file.
+    """
+    ShardWriterFlatBuffer._buffer_pool.release(bytearray(b"\xff" * (1 << 20)))
+
+    saved_data_description = [
+        Attribute(name="a", shape=(3, ), dtype="uint8"),
+        Attribute(name="b", shape=(5, ), dtype="float64"),
+    ]
+    examples = [{
+        "a": np.arange(3, dtype=np.uint8) + i,
+        "b": np.arange(5) + i,
+    } for i in range(7)]
+    content = shard_write_and_read(tmp_path / "shard_file",
+                                   saved_data_description, examples)
+
+    # All ranges of vectors (length and data) relative to the start of the
+    # file.
+    content_address = np.frombuffer(content, dtype=np.uint8).ctypes.data
+    shard = fbapi_Shard.Shard.GetRootAs(content, 0)
+    vectors: list[tuple[int, int]] = []
+    for i in range(len(examples)):
+        for j in range(len(saved_data_description)):
+            np_bytes = shard.Examples(i).Attributes(j).AttributeBytesAsNumpy()
+            start = np_bytes.ctypes.data - content_address
+            vectors.append((start - 4, start + np_bytes.size))
+    vectors.sort()
+
+    padding = b"".join(content[end:next_start]
+                       for (_, end), (next_start,
+                                      _) in zip(vectors, vectors[1:]))
+    assert padding
+    assert padding == bytes(len(padding))
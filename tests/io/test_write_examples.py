@@ -0,0 +1,86 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pytest
+
+import sedpack
+from sedpack.io import Dataset
+from sedpack.io import Metadata
+from sedpack.io.types import TRAIN_SPLIT, CompressionT, ShardFileTypeT
+
+
+@pytest.mark.parametrize("shard_file_type,compression", [
+    ("fb", "LZ4"),
+    ("npz", "ZIP"),
+    ("tfrec", "GZIP"),
+])
+def test_write_examples(tmpdir: Union[str,
+                                      Path], shard_file_type: ShardFileTypeT,
+                        compression: CompressionT) -> None:
+    array_of_values = np.random.random((1000, 13)).astype(np.float32)
+    tiny_experiment_path: Path = Path(tmpdir) / "write_examples"
+
+    dataset_structure = sedpack.io.metadata.DatasetStructure(
+        saved_data_description=[
+            sedpack.io.metadata.Attribute(
+                name="attribute_name",
+                dtype="float32",
+                shape=array_of_values[0].shape,
+            ),
+        ],
+        compression=compression,
+        examples_per_shard=256,
+        shard_file_type=shard_file_type,
+    )
+    dataset = Dataset.create(
+        path=tiny_experiment_path,
+        metadata=Metadata(description="Test of the lib"),
+        dataset_structure=dataset_structure,
+    )
+
+    # Batches which do not align with shard boundaries.
+    with dataset.filler() as filler:
+        filler.write_example(
+            values={"attribute_name": array_of_values[0]},
+            split=TRAIN_SPLIT,
+        )
+        for start in range(1, len(array_of_values), 300):
+            filler.write_examples(
+                values={
+                    "attribute_name": array_of_values[start:start + 300],
+                },
+                split=TRAIN_SPLIT,
+            )
+
+    dataset = Dataset(tiny_experiment_path)
+    dataset.check()
+
+    shard_infos = list(dataset.shard_info_iterator(TRAIN_SPLIT))
+    assert [shard_info.number_of_examples
+            for shard_info in shard_infos] == [256, 256, 256, 232]
+
+    seen: int = 0
+    for i, example in enumerate(
+            dataset.as_numpy_iterator(
+                split=TRAIN_SPLIT,
+                shuffle=0,
+                repeat=False,
+            )):
+        assert np.allclose(example["attribute_name"], array_of_values[i])
+        seen += 1
+    assert seen == len(array_of_values)